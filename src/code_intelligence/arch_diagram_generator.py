@@ -1,8 +1,11 @@
 """Architecture Diagram generator."""
 
-import os 
+import functools
+import os
 from typing import Any, List
 
+import asyncio
+
 from graphviz import Source
 
 from src.common.logger import get_logger
@@ -13,12 +16,29 @@ from src.llm import prompts
 logger = get_logger(__name__)
 
 
+# Template for one class entry in the diagram prompt. Kept at module
+# scope so prompt assembly is a single format + join per class.
+_CLASS_SUMMARY_TPL = (
+    "<JAVA_CLASS>\n"
+    "class_path: {path}\n"
+    "class_summary: {summary}\n"
+    "</JAVA_CLASS>\n"
+)
+
+
 class ArchDiagramGenerator:
     """Generates architecture diagram for project."""
     def __init__(self, root_dir: str, chunks: List[Any]):
         self.root_dir = root_dir
         self.chunks = chunks
-        
+
+        # Filter class chunks with summaries once up front so the
+        # full chunk list isn't rescanned on each prompt build.
+        self._class_chunks = [
+            chunk for chunk in chunks
+            if chunk.type == "class" and chunk.summary
+        ]
+
         self.model = self._load_model()
     
     def _load_model(self):
@@ -30,9 +50,9 @@ class ArchDiagramGenerator:
         project_id  = os.getenv("PROJECT_ID")
         location = os.getenv("LOCATION")
         model_name = os.getenv("MODEL_NAME")
-        return llm_client.LLMModel(
-            project_id=project_id, 
-            location=location, 
+        return llm_client.get_model(
+            project_id=project_id,
+            location=location,
             model_name=model_name,
             system_instruction=prompts.ARCHITECTURE_DIAGRAM_GENERATOR_SYSTEM_INSTRUCTION
         )
@@ -40,7 +60,9 @@ class ArchDiagramGenerator:
     async def process(self):
         """Main function to generate diagram."""
         dot_graph = await self._generate_dot_graph()
-        save_dot_graph(dot_graph, self.root_dir)
+        # Graphviz rendering shells out to `dot`; run it in a worker
+        # thread so other async work isn't blocked during rendering.
+        await asyncio.to_thread(save_dot_graph, dot_graph, self.root_dir)
         
     async def _generate_dot_graph(self) -> str:
         """Genereate DOT graph for GraphViz."""
@@ -70,35 +92,37 @@ class ArchDiagramGenerator:
         
         return dot_graph
 
-    def _load_java_class_summaries(self) -> List[str]:
-        """Load class summaries. 
-        
+    def _load_java_class_summaries(self) -> str:
+        """Load class summaries.
+
         Loads for each java class, the LLM generated summary.
-        
-        Returns: 
-            List of summary strings.
+
+        Returns:
+            Single string of all class summary blocks, ready to
+            substitute into the prompt.
         """
-        summaries =  [
-            f"""
-            <JAVA_CLASS>
-            class_path: {chunk.file_path}
-            class_summary: {chunk.summary}
-            </JAVA_CLASS>
-            """
-            for chunk in self.chunks
-            if chunk.type == "class" and chunk.summary
-        ]
-        return summaries
+        return "".join(
+            _CLASS_SUMMARY_TPL.format(
+                path=chunk.file_path, summary=chunk.summary)
+            for chunk in self._class_chunks
+        )
         
         
+@functools.lru_cache(maxsize=1)
 def load_project_readme(root_dir: str) -> str | None:
-    """Load Project's main README if exists."""
+    """Load Project's main README if exists.
+
+    Cached so repeat calls within a run don't re-scan the
+    directory or re-read the file.
+    """
     try:
-        for filename in os.listdir(root_dir):
-            if filename.upper().startswith("README"):
-                readme_path = os.path.join(root_dir, filename)
-                if os.path.isfile(readme_path):
-                    with open(readme_path, 'r', encoding='utf-8') as f:
+        # One directory scan with a case-insensitive match, so any
+        # casing (README, readme, ReadMe, ...) is found.
+        with os.scandir(root_dir) as entries:
+            for entry in entries:
+                if (entry.is_file()
+                        and entry.name.upper().startswith("README")):
+                    with open(entry.path, 'r', encoding='utf-8') as f:
                         return f.read()
         return None
     except Exception as e:
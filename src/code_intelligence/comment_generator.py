@@ -1,11 +1,15 @@
 """Comment Generator."""
 
+import functools
+import hashlib
 import os
 import re
 from typing import Any, Dict, List
 
 import asyncio
 
+from src.code_intelligence import embedder
+from src.common import cache
 from src.common import types
 from src.common.logger import get_logger
 from src.llm import llm_client
@@ -16,6 +20,18 @@ from src.parser import code_parser
 logger = get_logger(__name__)
 
 
+# Strips markdown code fences and stray leading "java" language
+# markers from model output. Compiled once; matches every chunk's
+# generated comment.
+_CLEANUP_RE = re.compile(r"```(?:java)?|^\s*java\s*\n?", re.MULTILINE)
+
+# Chunks with fewer whitespace-separated tokens than this are
+# considered trivial (tiny getters, two-line methods): retrieved
+# context adds nothing over the code itself, so the vector search
+# round-trip is skipped for them.
+MIN_RAG_TOKENS = int(os.getenv("MIN_RAG_TOKENS", "40"))
+
+
 class CommentGenerator:
     """Generators comments per chunk.
     
@@ -25,15 +41,27 @@ class CommentGenerator:
     retrieved from the vector store. 
     """
     def __init__(
-        self, 
-        vector_store: types.VectorStore, 
-        chunks: List[types.JavaSymbol], 
-        namespace: str
+        self,
+        vector_store: types.VectorStore,
+        chunks: List[types.JavaSymbol],
+        namespace: str,
+        max_concurrency: int = None
     ):
         self.vector_store = vector_store
         self.namespace = namespace
-        self.chunks = chunks 
+        self.chunks = chunks
         self.model = self._load_model()
+
+        # Bound in-flight Gemini calls so large codebases don't
+        # flood the endpoint and trigger 429s.
+        if max_concurrency is None:
+            max_concurrency = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        # Persistent cache of generated comments keyed by code hash,
+        # so reruns over unchanged chunks skip the LLM entirely.
+        self._comment_cache = cache.DiskCache(".comment_cache")
         
         # Store comments generated with respect to file + line number & indent
         # of code comment was generated for, and indent
@@ -48,9 +76,9 @@ class CommentGenerator:
         project_id  = os.getenv("PROJECT_ID")
         location = os.getenv("LOCATION")
         model_name = os.getenv("MODEL_NAME")
-        return llm_client.LLMModel(
-            project_id=project_id, 
-            location=location, 
+        return llm_client.get_model(
+            project_id=project_id,
+            location=location,
             model_name=model_name,
             system_instruction=prompts.COMMENT_GENERATOR_SYSTEM_INSTRUCTION
         )
@@ -74,63 +102,119 @@ class CommentGenerator:
             `*_commented.java` file without modifying the original
             code. 
         """
-        generate_comment_tasks = [
-            self._generate_comment(chunk)
-            for chunk in self.chunks
+        # Serve chunks whose code already has a cached comment from
+        # a previous run without any vector search or model call.
+        pending_chunks = []
+        for chunk in self.chunks:
+            cached_comment = self._comment_cache.get(
+                _comment_cache_key(chunk.code))
+            if cached_comment is not None:
+                self._merge_result(_build_comment_result(chunk, cached_comment))
+            else:
+                pending_chunks.append(chunk)
+        if not pending_chunks:
+            return
+
+        # Group chunks with identical code (auto-generated getters,
+        # copy-pasted boilerplate) so each unique body is embedded
+        # and prompted once, then fanned back out to every location.
+        chunk_groups: Dict[bytes, List[types.JavaSymbol]] = {}
+        for chunk in pending_chunks:
+            key = hashlib.blake2b(
+                chunk.code.encode("utf-8"), digest_size=16).digest()
+            chunk_groups.setdefault(key, []).append(chunk)
+        unique_chunks = [group[0] for group in chunk_groups.values()]
+
+        # Batch the similarity searches for all non-trivial chunks up
+        # front instead of one vector store round-trip per chunk.
+        # Trivial chunks get no retrieved context at all.
+        # TODO: Add metadata filters to improve search.
+        all_relevant_docs = [[] for _ in unique_chunks]
+        search_indices = [
+            i for i, chunk in enumerate(unique_chunks)
+            if len(chunk.code.split()) >= MIN_RAG_TOKENS
         ]
-        results = await asyncio.gather(*generate_comment_tasks)
-        for result in results:
-            if result:
-                file_path = result["file_path"]
-                self.generated_comments.setdefault(file_path, []).append(result["data"])
-
-    async def _generate_comment(self, chunk) -> Dict[str, Any]:
-        """Generate a code comment. 
-        
+        if search_indices:
+            try:
+                searched_docs = await embedder.batch_similarity_search(
+                    vector_store=self.vector_store,
+                    queries=[unique_chunks[i].code for i in search_indices],
+                    namespace=self.namespace
+                )
+                for i, docs in zip(search_indices, searched_docs):
+                    all_relevant_docs[i] = docs
+            except Exception as e:
+                logger.warning(
+                    f"Batched similarity search failed, generating comments without retrieved context: {e}")
+
+        # Feed chunk groups through a fixed pool of workers rather
+        # than a single gather, so results merge into
+        # generated_comments as they finish and memory stays bounded
+        # for large projects.
+        queue = asyncio.Queue()
+        for group, relevant_docs in zip(
+            chunk_groups.values(), all_relevant_docs
+        ):
+            queue.put_nowait((group, relevant_docs))
+
+        workers = [
+            asyncio.create_task(self._comment_worker(queue))
+            for _ in range(self.max_concurrency)
+        ]
+        await queue.join()
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _comment_worker(self, queue: asyncio.Queue) -> None:
+        """Consume chunk groups and merge results inline.
+
+        Each group shares identical code; the comment is generated
+        once and replicated to every member's location.
+        """
+        while True:
+            group, relevant_docs = await queue.get()
+            try:
+                result = await self._generate_comment(group[0], relevant_docs)
+                if result:
+                    comment = result["data"]["comment"]
+                    for chunk in group:
+                        self._merge_result(_build_comment_result(chunk, comment))
+            finally:
+                queue.task_done()
+
+    def _merge_result(self, result: Dict[str, Any]) -> None:
+        """Record a generated comment under its file path."""
+        file_path = result["file_path"]
+        self.generated_comments.setdefault(file_path, []).append(result["data"])
+
+    async def _generate_comment(self, chunk, relevant_docs) -> Dict[str, Any]:
+        """Generate a code comment.
+
         Inserts the relevant code snippets into prompt
         to geenerate a comprehensive comment using Gemini.
         """
         try:
-            query = chunk.code
-            # TODO: Add metadata filters to improve search. 
-            filter = None
-        
-            relevant_docs = self.vector_store.similarity_search(
-                query=query,
-                filter=filter,
-                namespace=self.namespace
-            )
-            
             prompt = prompts.COMMENT_GENERATOR_PROMPT_TEMPLATE.format(
                 similar_context=relevant_docs,
                 type=chunk.type,
                 name=chunk.name,
                 code=chunk.code
             )
-            comment_generated = await self.model.generate(prompt)
+            # Stream the response so generation of long Javadoc
+            # blocks overlaps with receiving them.
+            async with self._semaphore:
+                parts = []
+                async for part in self.model.generate_stream(prompt):
+                    parts.append(part)
+                comment_generated = "".join(parts)
             
             # Post-process model generated comment to be a valid
-            # Javadoc. 
-            # TODO: Clean up. 
-            comment_generated = comment_generated.replace(
-                "```", ""
-            ).replace(
-                "```java", ""
-            )
-            comment_generated = re.sub(
-                r'^\s*java\s*\n?', 
-                '', 
-                comment_generated, 
-                flags=re.MULTILINE
-            )
-            return {
-                "file_path": chunk.file_path,
-                "data": {
-                    "comment": comment_generated,
-                    "line_number": chunk.start_line,
-                    "indent_level": chunk.indent
-                }
-            }
+            # Javadoc.
+            comment_generated = _CLEANUP_RE.sub("", comment_generated)
+            self._comment_cache.set(
+                _comment_cache_key(chunk.code), comment_generated)
+            return _build_comment_result(chunk, comment_generated)
         except Exception as e:
             # TODO: Cleanup. 
             if "'code': 429" in str(e):
@@ -143,47 +227,97 @@ class CommentGenerator:
         """Write generated comments with original code to new file."""
         for file_path, file_comments in self.generated_comments.items():
             formatted_lines = format_file_comments(file_path, file_comments)
-            # Ensure new java file still has structural correctness. 
+            # Ensure new java file still has structural correctness.
             if validate_new_file(formatted_lines):
                 write_lines_to_file(file_path, formatted_lines)
             else:
                 logger.error("Updated file is not valid Java code.")
 
- 
-def format_file_comments(file_path: str, commments: List[Dict[str, Any]]):
-    """Format new java file with generated comments."""
-    with open(file_path, "r") as f:
-        lines = f.readlines()   
-    
+
+@functools.lru_cache(maxsize=1)
+def _get_java_parser():
+    """Load the Java grammar and parser once per process.
+
+    Validation runs per commented file; without this the compiled
+    grammar library would be re-initialized on every call.
+    """
+    return code_parser.load_java_parser()
+
+
+def _comment_cache_key(code: str) -> str:
+    """Content hash keying a chunk's generated comment."""
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+
+def _build_comment_result(chunk, comment: str) -> Dict[str, Any]:
+    """Build the generated-comment record for a chunk's location."""
+    return {
+        "file_path": chunk.file_path,
+        "data": {
+            "comment": comment,
+            "line_number": chunk.start_line,
+            "indent_level": chunk.indent
+        }
+    }
+
+
+def format_file_comments(
+    file_path: str,
+    commments: List[Dict[str, Any]]
+) -> List[bytes]:
+    """Format new java file with generated comments.
+
+    Returns:
+        The merged file lines, as bytes.
+    """
+    # Work in bytes throughout: tree-sitter consumes bytes anyway,
+    # so this skips a decode on read and a re-encode at validation
+    # and write time.
+    with open(file_path, "rb") as f:
+        lines = f.readlines()
+
     # Sort generated comments with respect to line number of code
-    # block they were generated for. 
+    # block they were generated for.
     comments_sorted = sorted(
-        commments, key=lambda x: x["line_number"], reverse=True)
-    
-    # Insert each comment block at the specified line number.
-    # Comments are inserted in reverse line order to prevent line number shifts 
-    # caused by earlier insertions affecting the position of later ones.
-    for comment in comments_sorted:
-        comment_line_num = comment["line_number"]
-        comment_block = format_comment_block(
-            comment["comment"], comment["indent_level"])
-        lines = lines[:comment_line_num - 1] + comment_block + lines[comment_line_num - 1:]
-    return lines
+        commments, key=lambda x: x["line_number"])
+
+    # Merge comment blocks into the file in a single pass over the
+    # original lines, rather than re-allocating the full line list
+    # for each insertion.
+    merged_lines = []
+    comment_idx = 0
+    num_comments = len(comments_sorted)
+    for line_idx, line in enumerate(lines):
+        while (
+            comment_idx < num_comments
+            and comments_sorted[comment_idx]["line_number"] - 1 == line_idx
+        ):
+            comment = comments_sorted[comment_idx]
+            merged_lines.extend(format_comment_block(
+                comment["comment"], comment["indent_level"]))
+            comment_idx += 1
+        merged_lines.append(line)
+
+    # Any comments pointing past the end of the file are appended.
+    for comment in comments_sorted[comment_idx:]:
+        merged_lines.extend(format_comment_block(
+            comment["comment"], comment["indent_level"]))
+    return merged_lines
     
     
-def format_comment_block(comment: str, indent_num: int) -> List[str]:
+def format_comment_block(comment: str, indent_num: int) -> List[bytes]:
     """Adjust indentation level for a preformatted JavaDoc comment block.
-    
+
     Returns:
-        List of indented lines for each comment line. 
+        List of indented byte lines for each comment line.
     """
-    indent = " " * indent_num
-    comment_lines = comment.strip().split('\n')
-    block = [f"{indent}{line.strip()}\n" for line in comment_lines]
+    indent = b" " * indent_num
+    comment_lines = comment.strip().encode("utf-8").split(b"\n")
+    block = [indent + line.strip() + b"\n" for line in comment_lines]
     return block
 
 
-def write_lines_to_file(file_path: str, lines: List[str]):
+def write_lines_to_file(file_path: str, lines: List[bytes]):
     """Write lines to new file."""
     rel_path = os.path.relpath(file_path)
     base, ext = os.path.splitext(rel_path)
@@ -192,16 +326,26 @@ def write_lines_to_file(file_path: str, lines: List[str]):
     
     # Ensure the output drectories exist.
     os.makedirs(os.path.dirname(output_file_path), exist_ok=True)
-    with open(output_file_path, "w") as f:
-        f.writelines(lines)
-
-
-def validate_new_file(file_lines: List[str]) -> bool:
-    """Validate a commented file is valid Java code."""
-    file_content = "\n".join(file_lines)
-    parser = code_parser.load_java_parser()
-    tree = parser.parse(bytes(file_content, "utf8"))
-    root_node = tree.root_node
-    if root_node.has_error:
-        return False
-    return True
+
+    # Join once and write raw bytes through a low-level fd, skipping
+    # the text-IO codec layer for each individual line.
+    data = b"".join(lines)
+    fd = os.open(output_file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+
+
+def validate_new_file(file_lines: List[bytes]) -> bool:
+    """Validate a commented file is valid Java code.
+
+    A single full parse of the merged bytes: the original file was
+    parsed in the worker pool, so no old tree survives into this
+    process for tree-sitter's incremental reparse to build on, and
+    re-parsing the original here just to enable it would cost more
+    than the full parse it saves.
+    """
+    parser = _get_java_parser()
+    tree = parser.parse(b"".join(file_lines))
+    return not tree.root_node.has_error
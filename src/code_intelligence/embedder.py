@@ -1,45 +1,268 @@
 """Create embeddings."""
 
-import os 
+import functools
+import hashlib
+import itertools
+import os
 import time
+from collections import OrderedDict
+from typing import List
 
+import asyncio
+
+from google import genai
+from google.genai import types as genai_types
 from langchain_core.documents import Document
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
+from langchain_core.embeddings import Embeddings
 from langchain_pinecone import PineconeVectorStore
 import pinecone
 from tenacity import retry, wait_random_exponential, stop_after_attempt
 
+from src.code_intelligence import semantic_cache
+from src.common import cache
 from src.common.logger import get_logger
 from src.common import types
 
 logger = get_logger(__name__)
 
+# Shared semantic cache of similarity search results, so
+# near-duplicate queries skip the remote Pinecone lookup.
+_search_cache = semantic_cache.SemanticSearchCache()
+
+
+# Number of texts sent per Gemini embed call when bulk-embedding
+# documents for the vector store. 100 is Gemini's documented cap per
+# batch embed request; larger values just get split (or rejected)
+# server-side.
+EMBED_BATCH_SIZE = 100
+
+# Number of vectors sent per Pinecone upsert. Decoupled from the
+# embed batch size since Pinecone happily takes larger groups.
+UPSERT_BATCH_SIZE = 250
+
+# Vectors per individual upsert request when fanning a batch out
+# over the Pinecone client's thread pool.
+UPSERT_REQUEST_SIZE = 100
+
+# Number of document batches embedded and upserted concurrently,
+# sized to stay under Gemini / Pinecone rate limits.
+UPLOAD_MAX_CONCURRENCY = int(os.getenv("EMBED_UPLOAD_CONCURRENCY", "8"))
+
+# In-process LRU cache of embedding vectors keyed by content hash.
+# Re-runs of the tool and duplicate chunks (e.g. boilerplate getters)
+# skip the Gemini embed call entirely on a hit. A persistent disk
+# cache sits behind the LRU so unchanged chunks stay free across
+# runs as well.
+EMBEDDING_CACHE_MAX_SIZE = 4096
+_embedding_cache: "OrderedDict[str, List[float]]" = OrderedDict()
+_embedding_disk_cache = cache.DiskCache(".cache/embeddings")
+
+
+def _embedding_cache_key(model: str, task_type: str, text: str) -> str:
+    """Content hash used as embedding cache key.
+
+    Includes the embedding model name and the task type, so
+    switching models — or embedding the same text once as a document
+    and once as a query — never serves the wrong vector.
+    """
+    return hashlib.sha256(
+        f"{model}\x00{task_type}\x00{text}".encode("utf-8")).hexdigest()
+
+
+def _embedding_cache_put(key: str, vector: List[float]) -> None:
+    """Store a vector in both the LRU and the disk cache."""
+    _embedding_cache[key] = vector
+    _embedding_cache.move_to_end(key)
+    if len(_embedding_cache) > EMBEDDING_CACHE_MAX_SIZE:
+        _embedding_cache.popitem(last=False)
+    _embedding_disk_cache.set(key, vector)
+
+
+def _embedding_cache_get(key: str) -> List[float]:
+    """Look up a vector in the LRU, falling back to the disk cache."""
+    cached = _embedding_cache.get(key)
+    if cached is not None:
+        _embedding_cache.move_to_end(key)
+        return cached
+    cached = _embedding_disk_cache.get(key)
+    if cached is not None:
+        # Promote disk hits into the in-process LRU.
+        _embedding_cache[key] = cached
+        if len(_embedding_cache) > EMBEDDING_CACHE_MAX_SIZE:
+            _embedding_cache.popitem(last=False)
+    return cached
+
+
+class GeminiEmbeddings(Embeddings):
+    """Embeddings backed directly by the google-genai client.
+
+    Calls the Gemini batch embed endpoint itself rather than going
+    through the langchain wrapper, which lets us set the task type
+    explicitly (RETRIEVAL_DOCUMENT for ingestion vs RETRIEVAL_QUERY
+    for lookups) and control the batch size per call.
+    """
+    def __init__(self, model: str, api_key: str = None):
+        self.model = model
+        self._client = genai.Client(api_key=api_key)
+
+    def _embed_batch(
+        self,
+        texts: List[str],
+        task_type: str,
+        batch_size: int = EMBED_BATCH_SIZE
+    ) -> List[List[float]]:
+        vectors = []
+        for i in range(0, len(texts), batch_size):
+            response = self._client.models.embed_content(
+                model=self.model,
+                contents=texts[i:i+batch_size],
+                config=genai_types.EmbedContentConfig(task_type=task_type)
+            )
+            vectors.extend(
+                embedding.values for embedding in response.embeddings)
+        return vectors
+
+    def embed_documents(
+        self,
+        texts: List[str],
+        batch_size: int = EMBED_BATCH_SIZE,
+        **kwargs
+    ) -> List[List[float]]:
+        return self._embed_batch(texts, "RETRIEVAL_DOCUMENT", batch_size)
+
+    def embed_queries(
+        self,
+        texts: List[str],
+        batch_size: int = EMBED_BATCH_SIZE,
+        **kwargs
+    ) -> List[List[float]]:
+        """Batch counterpart of `embed_query`.
+
+        Same single-call batching as `embed_documents`, but with the
+        query task type so batched lookups search the same space as
+        single-query ones.
+        """
+        return self._embed_batch(texts, "RETRIEVAL_QUERY", batch_size)
+
+    def embed_query(self, text: str, **kwargs) -> List[float]:
+        return self._embed_batch([text], "RETRIEVAL_QUERY")[0]
+
+
+class CachedEmbeddings(GeminiEmbeddings):
+    """Gemini embeddings with a content-hash cache.
+
+    Wraps `GeminiEmbeddings` so identical texts are only sent to
+    the embedding API once per process (LRU) and unchanged texts
+    are never re-embedded across runs (disk cache).
+    """
+    def _embed_cached(
+        self,
+        texts: List[str],
+        task_type: str,
+        embed_fn,
+        **kwargs
+    ) -> List[List[float]]:
+        keys = [
+            _embedding_cache_key(self.model, task_type, text)
+            for text in texts
+        ]
+        vectors = [_embedding_cache_get(key) for key in keys]
+
+        # Only send cache misses to the embedding API, embedding each
+        # unique missing text once and fanning the vector back out to
+        # all duplicates (identical getters, copy-pasted methods).
+        miss_indices = [i for i, vector in enumerate(vectors) if vector is None]
+        if miss_indices:
+            unique_misses = {}
+            for i in miss_indices:
+                unique_misses.setdefault(keys[i], texts[i])
+            miss_vectors = embed_fn(list(unique_misses.values()), **kwargs)
+            vector_by_key = dict(zip(unique_misses.keys(), miss_vectors))
+            for i in miss_indices:
+                vectors[i] = vector_by_key[keys[i]]
+                _embedding_cache_put(keys[i], vectors[i])
+        return vectors
+
+    def embed_documents(self, texts: List[str], **kwargs) -> List[List[float]]:
+        return self._embed_cached(
+            texts, "RETRIEVAL_DOCUMENT", super().embed_documents, **kwargs)
+
+    def embed_queries(self, texts: List[str], **kwargs) -> List[List[float]]:
+        return self._embed_cached(
+            texts, "RETRIEVAL_QUERY", super().embed_queries, **kwargs)
+
+    def embed_query(self, text: str, **kwargs) -> List[float]:
+        return self._embed_cached(
+            [text], "RETRIEVAL_QUERY", super().embed_queries, **kwargs)[0]
+
+
+@functools.lru_cache(maxsize=1)
+def _get_pinecone_client() -> pinecone.Pinecone:
+    """Shared Pinecone client for the process.
+
+    Client construction does control-plane calls and TLS setup;
+    one instance is reused everywhere instead of rebuilding it per
+    vector-store lookup.
+    """
+    return pinecone.Pinecone(
+        api_key=os.getenv("PINECONE_API_KEY"),
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def get_embeddings() -> CachedEmbeddings:
+    """Shared embeddings instance for the process.
+
+    Keeps a single genai client (and its connection pool) behind
+    all embed calls.
+    """
+    # NOTE: Using dense embeddings, could potentially use
+    # gemini embeddings to improve retrieval results.
+    return CachedEmbeddings(
+        model="models/text-embedding-004",
+        api_key=os.getenv("GEMINI_API_KEY"),
+    )
+
+
+# Symbol metadata memoized by symbol identity (the chunk objects
+# live for the whole run); chunks are traversed by several stages
+# (summaries, embedding, comments), so the dict is only assembled
+# once per symbol, and two symbols never share an entry even if
+# their ids were to collide.
+_symbol_metadata_cache: dict = {}
+
 
 def create_symbol_document(chunk: types.JavaSymbol):
     """Create a document to embed and store in a Vector store. """
-    page_content = chunk.code + "\n\n" + (chunk.summary or "")
-    
+    # Skip the concatenation (and its extra embedding tokens) when
+    # there's no summary yet.
+    page_content = (
+        f"{chunk.code}\n\n{chunk.summary}" if chunk.summary else chunk.code)
+
     # NOTE: I added this metadata if we wanted to turn this workflow
-    # into an agent to let users also ask questions about their 
-    # existing or updated codebase. 
-    metadata = {
-        "chunk_id": chunk.chunk_id,
-        "name": chunk.name,
-        "type": chunk.type.value,
-        "file_path": chunk.file_path,
-        "start_line": chunk.start_line,
-        "end_line": chunk.end_line,
-        "parent_class": chunk.parent_class or "",
-        "has_extends": len(chunk.extends) > 0,
-        "has_implements": len(chunk.implements) > 0,
-        "num_methods": len(chunk.methods),
-        "num_calls": len(chunk.calls)
-    }
+    # into an agent to let users also ask questions about their
+    # existing or updated codebase.
+    metadata = _symbol_metadata_cache.get(id(chunk))
+    if metadata is None:
+        metadata = {
+            "chunk_id": chunk.chunk_id,
+            "name": chunk.name,
+            "type": chunk.type.value,
+            "file_path": chunk.file_path,
+            "start_line": chunk.start_line,
+            "end_line": chunk.end_line,
+            "parent_class": chunk.parent_class or "",
+            "has_extends": len(chunk.extends) > 0,
+            "has_implements": len(chunk.implements) > 0,
+            "num_methods": len(chunk.methods),
+            "num_calls": len(chunk.calls)
+        }
+        _symbol_metadata_cache[id(chunk)] = metadata
     return Document(page_content=page_content, metadata=metadata)
 
 
-def load_or_create_vector_store(
-    chunks: types.JavaSymbol, 
+async def load_or_create_vector_store(
+    chunks: types.JavaSymbol,
     namespace: str
 ) -> PineconeVectorStore:
     """Create a vector store from chunks.
@@ -48,84 +271,274 @@ def load_or_create_vector_store(
         Pinecone Vector Store. 
     """
     index_name = os.getenv("INDEX_NAME", "code-comprehender")
-    
-    pc = pinecone.Pinecone(
-        api_key=os.getenv("PINECONE_API_KEY"),
-    )
-    
-    # Create index if doesn't exist. 
+
+    pc = _get_pinecone_client()
+
+    # Create index if doesn't exist.
     # This will create 1 index for the code-comprehender
     # tool, and for each Java project associate a namespace
     # to be able to retrieve vectors associated with each Java
-    # project. 
-    if not pc.has_index(index_name):
+    # project.
+    # timeout=-1 returns immediately instead of blocking the
+    # 10-30s an index takes to bootstrap; readiness is awaited
+    # below, overlapped with embedding the first batch.
+    # Control-plane calls are synchronous HTTP requests, so they run
+    # in threads to keep the event loop (and the concurrent diagram
+    # generation) unblocked.
+    created_index = False
+    if not await asyncio.to_thread(pc.has_index, index_name):
         dim = 768
-        pc.create_index(
-            name=index_name, 
-            spec=pinecone.ServerlessSpec(cloud="aws", region="us-east-1"), 
-            dimension=dim
-        )    
-        
+        await asyncio.to_thread(
+            pc.create_index,
+            name=index_name,
+            spec=pinecone.ServerlessSpec(cloud="aws", region="us-east-1"),
+            dimension=dim,
+            timeout=-1
+        )
+        created_index = True
+
     # TODO: Temp for 1 time project insertions. Doesn't handle upserts
-    # yet / changes to a code base yet. 
-    index = pc.Index(index_name)
-    namespace_description = index.describe_index_stats()
-    existing_namespaces = namespace_description.get(
-        "namespaces", {})
-    
-    # Load embeddings to use. 
-    # NOTE: Using dense embeddings, could potentially use 
-    # gemini embeddings to improve retrieval results. 
-    embeddings = GoogleGenerativeAIEmbeddings(
-        model="models/text-embedding-004",
-        google_api_key=os.getenv("GEMINI_API_KEY"),
+    # yet / changes to a code base yet.
+    # pool_threads lets upsert(async_req=True) requests run in
+    # parallel over one client.
+    # `Index` resolves the index host with a control-plane call, so
+    # it goes off-loop as well.
+    index = await asyncio.to_thread(
+        pc.Index,
+        index_name,
+        pool_threads=int(os.getenv("PINECONE_POOL_THREADS", "30"))
     )
+    if created_index:
+        # A brand-new index has no namespaces, and stats calls fail
+        # until it's ready anyway.
+        existing_namespaces = {}
+    else:
+        # Stats calls go over the network; run them off-loop so the
+        # diagram generator keeps making progress meanwhile.
+        namespace_description = await asyncio.to_thread(
+            index.describe_index_stats)
+        existing_namespaces = namespace_description.get(
+            "namespaces", {})
+
+    # Load embeddings to use.
+    embeddings = get_embeddings()
 
     # Create a namespace for project and add in documents
-    # for java chunks. 
+    # for java chunks.
     if namespace not in existing_namespaces:
-        # Create a langchain document for each chunk. 
-        documents = [create_symbol_document(chunk) for chunk in chunks]
-        
+        # Sort chunks by code length so each embed batch holds
+        # similarly sized texts; mixing tiny getters with huge
+        # classes makes the embedding service pad every item in the
+        # batch to the longest one. Upserts are order-independent,
+        # so the original chunk order doesn't need restoring.
+        # Documents themselves are produced lazily batch by batch,
+        # so the full page_content list is never held in memory
+        # alongside the chunks.
+        ordered_chunks = sorted(
+            chunks, key=lambda chunk: len(chunk.code), reverse=True)
+        doc_iter = (
+            create_symbol_document(chunk) for chunk in ordered_chunks)
+
+        first_batch = list(itertools.islice(doc_iter, UPSERT_BATCH_SIZE))
+        if created_index and first_batch:
+            # Hide index bootstrapping behind embedding compute:
+            # embed the first batch (vectors land in the embedding
+            # cache, so the upload below reuses them) while polling
+            # the index for readiness.
+            warmup = [
+                doc.page_content for doc in first_batch[:EMBED_BATCH_SIZE]]
+            await asyncio.gather(
+                asyncio.to_thread(embeddings.embed_documents, warmup),
+                asyncio.to_thread(_wait_for_index_ready, pc, index_name)
+            )
+
         # NOTE: Due to the Gemini embeddings quota,
-        #  we need to batch them. 
-        BATCH_SIZE = 250
-        for i in range(0, len(documents), BATCH_SIZE):
-            batch_docs = documents[i:i+BATCH_SIZE]
-            try:
-                upload_batch_to_vectorstore(
-                    batch_docs=batch_docs,
-                    index_name=index_name,
-                    embeddings=embeddings,
-                    namespace=namespace
-                )
-                # Wait for index to be consistent with inserted documents
-                # before moving to next step in workflow. 
-                time.sleep(10)
-            except Exception as e:
-                logger.warning(
-                    f"Embeddings quota error for batch: {e}.")
-                
+        #  we need to batch them. Batches upload concurrently,
+        # bounded by a semaphore, instead of serially; each in-flight
+        # batch embeds in EMBED_BATCH_SIZE micro-batches while other
+        # batches upsert, overlapping the two stages.
+        semaphore = asyncio.Semaphore(UPLOAD_MAX_CONCURRENCY)
+
+        async def _upload(batch_docs) -> int:
+            async with semaphore:
+                try:
+                    await asyncio.to_thread(
+                        upload_batch_to_vectorstore,
+                        batch_docs=batch_docs,
+                        index=index,
+                        embeddings=embeddings,
+                        namespace=namespace
+                    )
+                    return len(batch_docs)
+                except Exception as e:
+                    logger.warning(
+                        f"Embeddings quota error for batch: {e}.")
+                    return 0
+
+        upload_tasks = []
+        batch = first_batch
+        while batch:
+            upload_tasks.append(asyncio.create_task(_upload(batch)))
+            batch = list(itertools.islice(doc_iter, UPSERT_BATCH_SIZE))
+        batch_counts = await asyncio.gather(*upload_tasks)
+        uploaded_count = sum(batch_counts)
+
+        # Wait for the index to be consistent with the inserted
+        # documents before moving to the next step in the workflow.
+        # Later batches don't depend on earlier ones being visible,
+        # so we only poll once after the final batch instead of
+        # sleeping a fixed 10s between batches. The poll sleeps
+        # synchronously, so it runs in a thread to keep the event
+        # loop free for the concurrent diagram work.
+        await asyncio.to_thread(
+            _wait_for_namespace_count, index, namespace, uploaded_count)
+
     vector_store = PineconeVectorStore(
-        index_name="code-comprehender",
-        namespace="vehicle-management",
+        index_name=index_name,
+        namespace=namespace,
         embedding=embeddings
     )
-    
+
     return vector_store
 
 
+def _wait_for_index_ready(
+    pc: pinecone.Pinecone,
+    index_name: str,
+    timeout: float = 120.0,
+    poll_interval: float = 1.0
+) -> None:
+    """Poll a freshly created index until it reports ready."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        description = pc.describe_index(index_name)
+        if description.status.ready:
+            return
+        time.sleep(poll_interval)
+    logger.warning(
+        f"Index '{index_name}' not ready within {timeout}s; "
+        "continuing anyway.")
+
+
+def _wait_for_namespace_count(
+    index,
+    namespace: str,
+    expected_count: int,
+    timeout: float = 30.0,
+    poll_interval: float = 0.5
+) -> None:
+    """Poll index stats until the namespace reports the upserted vectors.
+
+    Gives up after `timeout` seconds rather than blocking the
+    workflow indefinitely; retrieval may just see slightly stale
+    results in that case.
+    """
+    if expected_count <= 0:
+        return
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        stats = index.describe_index_stats()
+        vector_count = (
+            stats.get("namespaces", {})
+            .get(namespace, {})
+            .get("vector_count", 0)
+        )
+        if vector_count >= expected_count:
+            return
+        time.sleep(poll_interval)
+    logger.warning(
+        f"Namespace '{namespace}' did not reach {expected_count} vectors "
+        f"within {timeout}s; continuing anyway.")
+
+
+async def batch_similarity_search(
+    vector_store: PineconeVectorStore,
+    queries: List[str],
+    namespace: str,
+    k: int = 4
+) -> List[List[Document]]:
+    """Run similarity search for many queries as one batch.
+
+    Embeds all queries in a single Gemini call instead of
+    one embed call per query, then issues the index lookups
+    concurrently. This avoids paying a network round-trip
+    per chunk.
+
+    Returns:
+        List of retrieved document lists, one per query,
+        in the same order as `queries`.
+    """
+    query_vectors = await asyncio.to_thread(
+        vector_store.embeddings.embed_queries, queries)
+
+    # Serve near-duplicate queries from the semantic cache and only
+    # hit Pinecone for the misses.
+    results = [
+        _search_cache.lookup(vector, namespace) for vector in query_vectors]
+    miss_indices = [i for i, result in enumerate(results) if result is None]
+
+    search_tasks = [
+        asyncio.to_thread(
+            vector_store.similarity_search_by_vector,
+            query_vectors[i],
+            k=k,
+            namespace=namespace
+        )
+        for i in miss_indices
+    ]
+    miss_results = await asyncio.gather(*search_tasks)
+    for i, documents in zip(miss_indices, miss_results):
+        results[i] = documents
+        _search_cache.insert(query_vectors[i], namespace, documents)
+    return results
+
+
+def upload_batch_to_vectorstore(batch_docs, index, embeddings, namespace):
+    """Insert documents as batch to vector store.
+
+    Embeds the batch explicitly through `embed_documents` (which
+    batches the Gemini calls) and upserts the precomputed vectors
+    straight to the index, instead of letting
+    `PineconeVectorStore.from_documents` embed one document at a
+    time internally. Embedding happens once, outside the retried
+    upsert, so transient Pinecone failures never burn Gemini
+    embedding quota.
+    """
+    texts = [doc.page_content for doc in batch_docs]
+    vectors = embeddings.embed_documents(texts, batch_size=EMBED_BATCH_SIZE)
+    records = [
+        {
+            "id": doc.metadata["chunk_id"],
+            "values": vector,
+            # Store the text under the langchain text key so
+            # PineconeVectorStore retrieval keeps working.
+            "metadata": {**doc.metadata, "text": text},
+        }
+        for doc, text, vector in zip(batch_docs, texts, vectors)
+    ]
+    _upsert_records(index, records, namespace)
+
+
 @retry(
     wait=wait_random_exponential(multiplier=10, max=60),
     stop=stop_after_attempt(5),
     reraise=True
 )
-def upload_batch_to_vectorstore(batch_docs, index_name, embeddings, namespace):
-    """Insert documents as batch to vector store."""
-    return PineconeVectorStore.from_documents(
-        documents=batch_docs,
-        index_name=index_name,
-        embedding=embeddings,
-        namespace=namespace
-    )
-    
\ No newline at end of file
+def _upsert_records(index, records, namespace):
+    """Upsert precomputed vectors, retrying on transient failures.
+
+    Upserts are idempotent (keyed by chunk id), so retrying the
+    whole batch is safe.
+    """
+    # Fan the upserts out over the index's thread pool and wait for
+    # them all, instead of one serial request per batch.
+    upsert_futures = [
+        index.upsert(
+            vectors=records[i:i+UPSERT_REQUEST_SIZE],
+            namespace=namespace,
+            async_req=True
+        )
+        for i in range(0, len(records), UPSERT_REQUEST_SIZE)
+    ]
+    for future in upsert_futures:
+        future.get()
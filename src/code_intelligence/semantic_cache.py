@@ -0,0 +1,120 @@
+"""Semantic cache for similarity search results.
+
+Java codebases contain many near-duplicate chunks (getters,
+setters, boilerplate) whose retrieved context is effectively
+identical. This cache stores query embeddings together with the
+documents Pinecone returned for them; a new query whose embedding
+is close enough (cosine similarity above a threshold) to a cached
+one reuses the cached documents without a remote lookup.
+"""
+
+import os
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.common.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+# Minimum cosine similarity between a query embedding and a cached
+# embedding for the cached result to be reused.
+SIMILARITY_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+
+# Maximum number of cached (embedding, documents) entries.
+MAX_CACHE_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "512"))
+
+
+class SemanticSearchCache:
+    """Approximate cache of similarity search results.
+
+    Cached embeddings live in one preallocated contiguous float32
+    matrix, so a lookup is a single matrix-vector product over all
+    entries instead of a Python loop of per-entry dot products.
+    Eviction is least-recently-used.
+    """
+    def __init__(
+        self,
+        threshold: float = SIMILARITY_THRESHOLD,
+        capacity: int = MAX_CACHE_ENTRIES
+    ):
+        self.threshold = threshold
+        self.capacity = capacity
+
+        # Allocated lazily on first insert, once the embedding
+        # dimension is known.
+        self._vectors: Optional[np.ndarray] = None
+        self._last_used: Optional[np.ndarray] = None
+        self._results: List[List[Document]] = []
+        self._namespaces: List[str] = []
+        self._clock = 0
+
+    def lookup(
+        self,
+        query_vector: List[float],
+        namespace: str
+    ) -> Optional[List[Document]]:
+        """Return cached documents for a close-enough query, else None.
+
+        Only entries cached under the same namespace are candidates;
+        similar code in another project must never serve its results
+        across namespaces.
+        """
+        num_entries = len(self._results)
+        if num_entries == 0:
+            return None
+
+        query = _normalize(query_vector)
+        # Rows are unit vectors, so one matvec yields every cosine
+        # similarity at once.
+        similarities = self._vectors[:num_entries] @ query
+        for entry_namespace, row in zip(self._namespaces, range(num_entries)):
+            if entry_namespace != namespace:
+                similarities[row] = -1.0
+        best_index = int(similarities.argmax())
+        if similarities[best_index] >= self.threshold:
+            self._clock += 1
+            self._last_used[best_index] = self._clock
+            return self._results[best_index]
+        return None
+
+    def insert(
+        self,
+        query_vector: List[float],
+        namespace: str,
+        documents: List[Document]
+    ) -> None:
+        """Cache the documents retrieved for a namespaced query."""
+        if self.capacity <= 0:
+            return
+
+        query = _normalize(query_vector)
+        if self._vectors is None:
+            self._vectors = np.empty(
+                (self.capacity, query.shape[0]), dtype=np.float32)
+            self._last_used = np.zeros(self.capacity, dtype=np.int64)
+
+        if len(self._results) < self.capacity:
+            row = len(self._results)
+            self._results.append(documents)
+            self._namespaces.append(namespace)
+        else:
+            # Overwrite the least recently used entry in place.
+            row = int(self._last_used[:len(self._results)].argmin())
+            self._results[row] = documents
+            self._namespaces[row] = namespace
+
+        self._vectors[row] = query
+        self._clock += 1
+        self._last_used[row] = self._clock
+
+
+def _normalize(vector: List[float]) -> np.ndarray:
+    """L2-normalize a vector so lookups reduce to a dot product."""
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    if norm == 0.0:
+        return array
+    return array / norm
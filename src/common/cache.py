@@ -0,0 +1,63 @@
+"""Persistent key/value cache.
+
+Small SQLite-backed store used to memoize expensive API results
+(LLM generations, embeddings) across runs, keyed by content hash.
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Any
+
+import orjson
+
+
+class DiskCache:
+    """SQLite-backed key/value cache.
+
+    Values are JSON-serialized with orjson (much faster than stdlib
+    json for the large comment/embedding records stored here), so
+    anything stored must be JSON-compatible (strings, numbers,
+    lists, dicts). Safe to use from multiple threads within a
+    process.
+    """
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(directory, "cache.db"),
+            check_same_thread=False
+        )
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache "
+                "(key TEXT PRIMARY KEY, value TEXT)"
+            )
+            self._conn.commit()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the cached value for key, or default on a miss."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return default
+        return orjson.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value under key, replacing any existing entry."""
+        serialized = orjson.dumps(value).decode("utf-8")
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)",
+                (key, serialized)
+            )
+            self._conn.commit()
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        return row is not None
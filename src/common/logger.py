@@ -2,8 +2,15 @@
 
 import logging
 
+# Root-logger configuration only needs to happen once per process;
+# get_logger is called from every module import, so the flag keeps
+# repeat calls to a cheap getLogger lookup.
+_CONFIGURED = False
+
+
 def get_logger(name: str):
     """Code comprehender logger."""
+    global _CONFIGURED
     logger = logging.getLogger(name)
     logger.setLevel(logging.INFO)
     if not logger.handlers:
@@ -14,6 +21,11 @@ def get_logger(name: str):
         )
         handler.setFormatter(formatter)
         logger.addHandler(handler)
-    logging.getLogger().setLevel(logging.WARNING)
+    # Each logger has its own handler, so don't also bubble records
+    # up to the root handler (avoids duplicate log lines).
+    logger.propagate = False
+    if not _CONFIGURED:
+        logging.getLogger().setLevel(logging.WARNING)
+        _CONFIGURED = True
 
     return logger
@@ -1,10 +1,10 @@
-"""Pydantic models."""
+"""Shared type definitions."""
 
+import functools
 from enum import Enum
 from typing import List, Optional, TypeAlias
 
 import langchain_pinecone
-from pydantic import BaseModel
 
 
 VectorStore: TypeAlias = langchain_pinecone.PineconeVectorStore
@@ -13,17 +13,36 @@ class SymbolType(str, Enum):
     """Symbol / Chunk types."""
     CLASS = "class"
     METHOD = "method"
-    
-    
-class JavaSymbol(BaseModel):
-    """Pydantic model for a `Node` chunk.
+
+
+@functools.lru_cache(maxsize=64)
+def _file_bytes(path: str) -> bytes:
+    """Raw bytes of a source file, cached across symbols."""
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class JavaSymbol:
+    """A `Node` chunk.
+
+    A plain slots class: the parser creates one instance per symbol,
+    so skipping per-instance validation and `__dict__` keeps
+    construction cheap and memory compact on large codebases.
+
+    Symbols normally store only their byte range within
+    `file_path`; `code` is materialized lazily from the (cached)
+    file bytes, so a class's text isn't duplicated across the class
+    chunk and every one of its method chunks. Passing `code=`
+    explicitly overrides the byte range, for symbols not backed by a
+    file on disk.
 
     Attributes:
         chunk_id: Unique identifier for the chunk.
         name: Name of the chunk.
         type: Type of the chunk.
         file_path: File path of the chunk.
-        code: Code of the chunk.
+        start_byte: Byte offset where the chunk starts in the file.
+        end_byte: Byte offset where the chunk ends in the file.
         start_line: Starting line number of the chunk.
         end_line: Ending line number of the chunk.
         indent: Indent level of the chunk.
@@ -33,18 +52,77 @@ class JavaSymbol(BaseModel):
         methods: List of methods in the chunk.
         calls: List of calls made by the chunk.
         summary: LLM generated summary of the chunk.
+        skip_llm: Whether the chunk is trivial (getter/setter or
+            empty body) and should skip LLM summarization.
     """
-    chunk_id: str
-    name: str
-    type: SymbolType           
-    file_path: str
-    code: str
-    start_line: int
-    end_line: int
-    indent: int
-    parent_class: Optional[str] = None
-    extends: List[str] = []
-    implements: List[str] = []
-    methods: List[str] = []
-    calls: List[str] = []
-    summary: Optional[str] = None
\ No newline at end of file
+    __slots__ = (
+        "chunk_id",
+        "name",
+        "type",
+        "file_path",
+        "start_byte",
+        "end_byte",
+        "_code",
+        "start_line",
+        "end_line",
+        "indent",
+        "parent_class",
+        "extends",
+        "implements",
+        "methods",
+        "calls",
+        "summary",
+        "skip_llm",
+    )
+
+    def __init__(
+        self,
+        chunk_id: str,
+        name: str,
+        type: SymbolType,
+        file_path: str,
+        start_line: int,
+        end_line: int,
+        indent: int,
+        start_byte: int = 0,
+        end_byte: int = 0,
+        code: Optional[str] = None,
+        parent_class: Optional[str] = None,
+        extends: Optional[List[str]] = None,
+        implements: Optional[List[str]] = None,
+        methods: Optional[List[str]] = None,
+        calls: Optional[List[str]] = None,
+        summary: Optional[str] = None,
+        skip_llm: bool = False,
+    ):
+        self.chunk_id = chunk_id
+        self.name = name
+        self.type = type
+        self.file_path = file_path
+        self.start_byte = start_byte
+        self.end_byte = end_byte
+        self._code = code
+        self.start_line = start_line
+        self.end_line = end_line
+        self.indent = indent
+        self.parent_class = parent_class
+        self.extends = extends if extends is not None else []
+        self.implements = implements if implements is not None else []
+        self.methods = methods if methods is not None else []
+        self.calls = calls if calls is not None else []
+        self.summary = summary
+        self.skip_llm = skip_llm
+
+    @property
+    def code(self) -> str:
+        """Chunk source text, read lazily from the file bytes."""
+        if self._code is not None:
+            return self._code
+        return _file_bytes(self.file_path)[
+            self.start_byte:self.end_byte].decode("utf-8")
+
+    def __repr__(self) -> str:
+        return (
+            f"JavaSymbol(chunk_id={self.chunk_id!r}, "
+            f"type={self.type.value!r}, file_path={self.file_path!r})"
+        )
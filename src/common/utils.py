@@ -1,17 +1,21 @@
 """Utility Functions."""
 
-import os 
+import itertools
 from pathlib import Path
 
 
 def generate_namespace(input_dir: str) -> str:
     """Generate namespace for index."""
     resolved_path = Path(input_dir).resolve()
+    # Path.name is already the last non-root component, so the common
+    # case needs no scan over parts.
+    if resolved_path.name:
+        return resolved_path.name
     parts = resolved_path.parts
     for part in parts[::-1]:
         if part not in (resolved_path.root, resolved_path.drive):
             namespace = part
-            return namespace    
+            return namespace
 
 
 def remove_code_comprehender_outputs(root_dir: str) -> None:
@@ -19,8 +23,12 @@ def remove_code_comprehender_outputs(root_dir: str) -> None:
     
     Used for testing workflow. 
     """
-    for dirpath, _, filenames in os.walk(root_dir):
-        for filename in filenames:
-            if filename.endswith("_commented.java") or filename.endswith("architecture_diagram.png"):
-                file_path = os.path.join(dirpath, filename)
-                os.remove(file_path)
+    root = Path(root_dir)
+    # rglob walks the tree once per pattern in C instead of matching
+    # every filename suffix in Python.
+    outputs = itertools.chain(
+        root.rglob("*_commented.java"),
+        root.rglob("architecture_diagram.png"),
+    )
+    for file_path in outputs:
+        file_path.unlink(missing_ok=True)
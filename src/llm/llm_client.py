@@ -2,20 +2,86 @@
 This file deinfes a class for interacting with a LLM (specificall Gemini).
 """
 
-from typing import Any, Dict
+import functools
+import hashlib
+import os
+from typing import Any, Dict, List, Optional
 
-from tenacity import retry, stop_after_delay, wait_random_exponential
+import asyncio
+
+import httpx
+import orjson
+from tenacity import AsyncRetrying, retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
 
 from google import genai
+from google.genai import errors
 from google.genai import types
 
+from src.common import cache
+from src.common.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# Persistent cache of generated text keyed by a hash of the full
+# request (model, system instruction, prompt, sampling params).
+# Reruns and duplicate prompts skip the Gemini call entirely.
+_generation_cache = cache.DiskCache(".cache/llm")
+
+
+@functools.lru_cache(maxsize=32)
+def _make_generation_config(
+    system_instruction: str,
+    temperature: float,
+    top_p: float,
+    response_mime_type: str,
+    thinking_budget: int
+) -> "types.GenerateContentConfig":
+    """Build (or reuse) a generation config for these parameters.
+
+    Config construction re-validates the multi-KB system
+    instruction; memoizing lets every LLMModel with identical
+    parameters share one config object.
+    """
+    return types.GenerateContentConfig(
+        system_instruction=system_instruction,
+        temperature=temperature,
+        top_p=top_p,
+        response_mime_type=response_mime_type,
+        thinking_config=types.ThinkingConfig(
+            thinking_budget=thinking_budget
+        )
+    )
+
+
+def _is_retriable_error(exception: BaseException) -> bool:
+    """Whether a Gemini error is worth retrying.
+
+    Retries rate-limit (429) and transient server errors; anything
+    else (bad request, auth, etc.) fails fast instead of burning
+    the backoff budget.
+    """
+    return (
+        isinstance(exception, errors.APIError)
+        and exception.code in (429, 500, 503)
+    )
+
 
 class LLMModel:
     """Abstraction from LLM client libraries.
     
-    Attributes: 
-        model_name (str): Model name.        
+    Attributes:
+        model_name (str): Model name.
     """
+    # Global gate on in-flight Gemini calls, shared by every model
+    # instance. Without it, summary and comment generation together
+    # can fire hundreds of concurrent requests and collapse into a
+    # 429/backoff storm; bounding keeps throughput steady near the
+    # quota ceiling.
+    _max_concurrency = int(os.getenv("GEMINI_CONCURRENCY", "8"))
+    _semaphore = asyncio.Semaphore(_max_concurrency)
+
     def __init__(
         self, 
         location: str, 
@@ -39,47 +105,187 @@ class LLMModel:
         self.generation_config = self._load_generation_config()
         
     def _init_client(self):
-        """Init Gemini client."""
+        """Init Gemini client.
+
+        Sizes the underlying httpx connection pool to the call
+        concurrency so parallel requests reuse keep-alive
+        connections instead of serializing on pool slots or paying
+        a TLS handshake each.
+        """
+        limits = httpx.Limits(
+            max_connections=self._max_concurrency * 2,
+            max_keepalive_connections=self._max_concurrency,
+        )
         client = genai.Client(
             project=self.project_id,
             location=self.location,
             vertexai=True,
+            http_options=types.HttpOptions(
+                client_args={"limits": limits},
+                async_client_args={"limits": limits},
+            ),
         )
         return client
     
     def _load_generation_config(self) -> types.GenerateContentConfig:
         """Load generation config for each Gemini Call."""
-        return types.GenerateContentConfig(
+        return _make_generation_config(
             system_instruction=self.system_instruction,
             temperature=self.temperature,
             top_p=self.top_p,
             response_mime_type=self.response_mime_type,
-            thinking_config=types.ThinkingConfig(
-                thinking_budget=self.thinking_budget
-            )
+            thinking_budget=self.thinking_budget
         )
 
     @retry(
-        stop=stop_after_delay(16),
-        wait=wait_random_exponential(multiplier=1, max=16),
+        retry=retry_if_exception(_is_retriable_error),
+        stop=stop_after_attempt(6),
+        wait=wait_exponential_jitter(initial=1, max=60),
         reraise=True
     )
-    async def generate(self, prompt: str) -> str:
+    async def generate(self, prompt: str, config=None) -> str:
         """Send request to Gemini.
 
         Args:
             prompt: The prompt to send to Gemini.
-            
-        Returns: 
+            config: Optional generation config overriding the
+                model's default (e.g. JSON mode for batch calls).
+
+        Returns:
             Gemini response as text.
         """
-        response = await self.client.aio.models.generate_content(
-            model=self.model_name,
-            contents=prompt,
-            config=self.generation_config,
+        config = config if config is not None else self.generation_config
+        cache_key = self._generation_cache_key(
+            prompt, config.response_mime_type)
+        if cache_key is not None:
+            cached = _generation_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        async with self._semaphore:
+            response = await self.client.aio.models.generate_content(
+                model=self.model_name,
+                contents=prompt,
+                config=config,
+            )
+        text = self._parse_response(response)
+        if cache_key is not None and text is not None:
+            _generation_cache.set(cache_key, text)
+        return text
+
+    def _generation_cache_key(
+        self,
+        prompt: str,
+        response_mime_type: str
+    ) -> Optional[str]:
+        """Cache key for a prompt, or None when caching is unsafe.
+
+        Sampling with temperature > 0 is intentionally
+        non-deterministic, so those generations are never cached.
+        """
+        if self.temperature > 0:
+            return None
+        return hashlib.sha256(
+            "\x00".join([
+                self.model_name,
+                self.system_instruction or "",
+                prompt,
+                str(self.temperature),
+                str(self.top_p),
+                response_mime_type,
+            ]).encode("utf-8")
+        ).hexdigest()
+
+    _BATCH_PROMPT_HEADER = (
+        "Answer every request below independently.\n"
+        "Return ONLY a JSON array where each element is an object "
+        '{"id": <request id>, "response": "<your answer>"} — one '
+        "element per request, no markdown fences or extra text.\n\n"
+    )
+
+    async def generate_batch(self, prompts: List[str]) -> List[Optional[str]]:
+        """Answer several prompts with a single Gemini request.
+
+        Packs the prompts into one structured-output call instead of
+        one HTTP round-trip each, which is substantially cheaper for
+        many small prompts.
+
+        Args:
+            prompts: The prompts to send to Gemini.
+
+        Returns:
+            One response string per prompt, in prompt order; entries
+            the model failed to answer are None.
+        """
+        sections = "".join(
+            f'<REQUEST id="{i}">\n{prompt}\n</REQUEST>\n'
+            for i, prompt in enumerate(prompts)
         )
-        return self._parse_response(response)
-    
+        # JSON mode constrains the model to emit the array directly,
+        # so no fence-stripping or free-text recovery is needed.
+        config = _make_generation_config(
+            system_instruction=self.system_instruction,
+            temperature=self.temperature,
+            top_p=self.top_p,
+            response_mime_type="application/json",
+            thinking_budget=self.thinking_budget,
+        )
+        text = await self.generate(
+            self._BATCH_PROMPT_HEADER + sections, config=config)
+
+        responses: List[Optional[str]] = [None] * len(prompts)
+        try:
+            entries = orjson.loads(text)
+        except (orjson.JSONDecodeError, TypeError):
+            logger.error("Could not parse batch response as JSON.")
+            return responses
+        for entry in entries:
+            request_id = entry.get("id")
+            if isinstance(request_id, int) and 0 <= request_id < len(prompts):
+                responses[request_id] = entry.get("response")
+        return responses
+
+    async def generate_stream(self, prompt: str):
+        """Send request to Gemini and stream the response.
+
+        Yields response text as it arrives instead of waiting for
+        the full generation, so callers can overlap network time
+        with their own post-processing.
+
+        Runs under the shared concurrency gate and retries the same
+        transient errors as `generate`. Retries only happen before
+        the first chunk is yielded (where 429s surface); replaying
+        a partially consumed stream would duplicate output, so
+        mid-stream failures propagate instead.
+
+        Args:
+            prompt: The prompt to send to Gemini.
+
+        Yields:
+            Chunks of Gemini response text.
+        """
+        state = {"yielded": False}
+        attempts = AsyncRetrying(
+            retry=retry_if_exception(
+                lambda e: _is_retriable_error(e) and not state["yielded"]),
+            stop=stop_after_attempt(6),
+            wait=wait_exponential_jitter(initial=1, max=60),
+            reraise=True,
+        )
+        async with self._semaphore:
+            async for attempt in attempts:
+                with attempt:
+                    response_stream = (
+                        await self.client.aio.models.generate_content_stream(
+                            model=self.model_name,
+                            contents=prompt,
+                            config=self.generation_config,
+                        ))
+                    async for chunk in response_stream:
+                        if chunk.text:
+                            state["yielded"] = True
+                            yield chunk.text
+
     @staticmethod
     def _parse_response(response: types.GenerateContentResponse):
         """Parse response from Gemini.
@@ -95,14 +301,41 @@ class LLMModel:
     def get_response_metadata(self, response: types.GenerateContentResponse) -> Dict[str, Any]:
         """Get metadata from Gemini response."""
         usage_metadata = response.usage_metadata
-        
+
         input_tokens = usage_metadata.prompt_token_count
         output_tokens = usage_metadata.candidates_token_count
         total_tokens = usage_metadata.total_token_count
-        
+
         return {
             "num_input_tokens": input_tokens,
             "num_output_tokens": output_tokens,
             "total_tokens": total_tokens
         }
-        
\ No newline at end of file
+
+
+# Shared LLMModel instances keyed by configuration, so concurrent
+# generators reuse one Gemini client (and its underlying HTTP
+# connection pool) instead of paying per-instance client setup.
+_MODEL_CACHE: Dict[tuple, LLMModel] = {}
+
+
+def get_model(
+    project_id: str,
+    location: str,
+    model_name: str,
+    system_instruction: str = None,
+    **kwargs
+) -> LLMModel:
+    """Return a shared LLMModel for the given configuration."""
+    key = (project_id, location, model_name, system_instruction)
+    model = _MODEL_CACHE.get(key)
+    if model is None:
+        model = LLMModel(
+            project_id=project_id,
+            location=location,
+            model_name=model_name,
+            system_instruction=system_instruction,
+            **kwargs
+        )
+        _MODEL_CACHE[key] = model
+    return model
@@ -10,6 +10,14 @@ import asyncio
 
 from dotenv import load_dotenv
 
+# uvloop cuts event-loop overhead for the many concurrent Gemini /
+# Pinecone calls; fall back to the default loop where unavailable
+# (e.g. Windows).
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 from src.code_intelligence import arch_diagram_generator
 from src.code_intelligence import comment_generator
 from src.code_intelligence import embedder
@@ -70,38 +78,49 @@ async def main():
     chunks = parser.parse_project()
     
 
-    try:
-        # Generate summaries with an LLM for each chunk. 
-        # NOTE: These are used for the architecture diagram task, 
-        # but could also be leverage for better retrieval for an 
-        # agentic system. 
-        logger.info("Generating summaries for each code chunk...")
-        await generate_all_chunk_summaries(chunks=chunks)    
-        await arch_diagram_generator.ArchDiagramGenerator(
-            root_dir=args.input_dir,
-            chunks=chunks
-        ).process()
-        logger.info("Successfully generated architecture diagram.")
-    except Exception as e:
-        logger.error(f"Failed to generate architecture diagram: {str(e)}")
-    
-    # Create vector store. 
-    logger.info("Retrieving Vector Store...")
-    vector_store = embedder.load_or_create_vector_store(
-        chunks=chunks, 
-        namespace=args.namespace
-    )
-    
-    try:
-        logger.info("Generating comments...")
-        await comment_generator.CommentGenerator(
+    # Generate summaries with an LLM for each chunk.
+    # NOTE: These are used for the architecture diagram task,
+    # but could also be leverage for better retrieval for an
+    # agentic system.
+    logger.info("Generating summaries for each code chunk...")
+    await generate_all_chunk_summaries(chunks=chunks)
+
+    # The diagram only needs the summaries, while comments need the
+    # vector store first — so the diagram runs concurrently with the
+    # whole embed-then-comment pipeline.
+    async def _comment_pipeline():
+        logger.info("Retrieving Vector Store...")
+        vector_store = await embedder.load_or_create_vector_store(
+            chunks=chunks,
+            namespace=args.namespace
+        )
+        return await comment_generator.CommentGenerator(
             vector_store=vector_store,
             namespace=args.namespace,
             chunks=chunks
         ).process()
+
+    logger.info("Generating architecture diagram and comments...")
+    results = await asyncio.gather(
+        arch_diagram_generator.ArchDiagramGenerator(
+            root_dir=args.input_dir,
+            chunks=chunks
+        ).process(),
+        _comment_pipeline(),
+        return_exceptions=True
+    )
+    diagram_result, comment_result = results
+    if isinstance(diagram_result, Exception):
+        logger.error(
+            f"Failed to generate architecture diagram: {str(diagram_result)}")
+    else:
+        logger.info("Successfully generated architecture diagram.")
+    if isinstance(comment_result, Exception):
+        logger.error(f"Failed to generate code comments: {str(comment_result)}")
+    else:
         logger.info("Successfully generated code comments")
-    except Exception as e:
-        logger.error(f"Failed to generate code comments: {str(e)}")
     
 if __name__ == "__main__":
+    if uvloop is not None:
+        uvloop.install()
     asyncio.run(main())
@@ -1,7 +1,10 @@
 """Module to parse a code repo."""
 
-import os 
-from typing import List, Tuple
+import functools
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
 
 from tree_sitter import Language, Node, Parser
 import tree_sitter_java as tree_sitter_java
@@ -36,20 +39,39 @@ class JavaCodeParser:
             List of `JavaSymbols` as chunks. 
         """
         java_files = self._get_java_files()
-        for file_path in java_files:
-            self._parse_file(file_path)
+        # tree-sitter parsing and the tree walk are CPU-bound, so
+        # files are parsed across processes rather than serially in
+        # the main thread; chunksize amortizes the pickling overhead
+        # of many small files.
+        with ProcessPoolExecutor() as executor:
+            for file_chunks in executor.map(
+                    parse_file_worker, java_files, chunksize=8):
+                self.chunks.extend(file_chunks)
         return self.chunks
         
-    def _get_java_files(self) -> List[str]:
-        """Get file paths of all java files in directory."""
+    def _get_java_files(self):
+        """Get file paths of all java files in directory.
+
+        Validates the root eagerly, then yields paths lazily via
+        `os.scandir` so the process pool starts parsing before the
+        directory scan finishes.
+        """
         if not os.path.exists(self.root_dir):
             raise FileNotFoundError(
                 f"Directory '{self.root_dir}' does not exist.")
-        return [
-            os.path.join(root, file)
-            for root, _, files in os.walk(self.root_dir)
-            for file in files if file.endswith(".java")
-        ]
+        return self._iter_java_files(self.root_dir)
+
+    @staticmethod
+    def _iter_java_files(directory: str):
+        """Yield java file paths under `directory`, depth first."""
+        stack = [directory]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.endswith(".java"):
+                        yield entry.path
         
     def _parse_file(self, file_path) -> None:
         """Parses elements from a Java file.
@@ -59,171 +81,248 @@ class JavaCodeParser:
         into a symbol / node that contains metadata about the 
         current node and its relationship to other methods or classes.
         """
-        with open(file_path, "r") as f:
-            code = f.read()
-            
-        # Get tree of file. 
-        tree = self.parser.parse(code.encode("utf-8"))
-        
-        # Traverse through tree to construct symbols and 
-        # extract relationships. 
-        self._walk(tree.root_node, code, file_path)
+        # Memory-map the file instead of read(): tree-sitter parses
+        # straight out of the page cache with no userspace copy, and
+        # node offsets are byte offsets so slices stay correct for
+        # non-ASCII files. Empty files can't be mapped (and have no
+        # symbols anyway).
+        with open(file_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as code:
+                # Get tree of file.
+                tree = self.parser.parse(code)
+
+                # Traverse through tree to construct symbols and
+                # extract relationships.
+                self._walk(tree.root_node, code, file_path)
         
     def _walk(
-        self, 
-        node: Node, 
-        code: str, 
-        file_path: str, 
-        parent_class: str = None, 
+        self,
+        node: Node,
+        code: bytes,
+        file_path: str,
+        parent_class: str = None,
         class_method_list = None
     ) -> None:
-        """Walk through tree to construct symbols."""
-        name = self._get_child_text(node, "name", code)
-        
-        code_start_line = node.start_point[0] + 1
-        code_end_line = node.end_point[0] + 1
-        code_indent_level = node.start_point[1]
-
-        node_code = code[node.start_byte:node.end_byte]
-
-        # Check if current node is a class.
-        if node.type == "class_declaration":
-            # Get name of current node.
-            # TODO: Clean up because used in both parts of the code. 
-            
-            extends, implements = self._get_inheritance(node, code)
-            # List to store methods a class contains.
-            method_list = []
-            
-            for child in node.children:
-                self._walk(
-                    child, 
-                    code, 
-                    file_path, 
-                    parent_class=name, 
-                    class_method_list=method_list
-                )
+        """Collect symbols with one compiled tree-sitter query pass.
 
-            self.chunks.append(
-                types.JavaSymbol(
-                    chunk_id=f"file_path::{name}",
-                    name=name,
-                    type=types.SymbolType.CLASS,
-                    file_path=file_path,
-                    code=node_code,
-                    start_line=code_start_line,
-                    end_line=code_end_line,
-                    indent=code_indent_level,
-                    extends=extends,
-                    implements=implements,
-                    methods=method_list
-                )
+        The query engine matches every class, method, inheritance
+        clause, and method invocation in C in a single traversal;
+        Python only post-processes the capture lists instead of
+        dispatching on `node.type` for every node in the file.
+
+        `code` is the raw file bytes; node offsets are byte offsets,
+        and slices are only decoded at the leaves that land on a
+        `JavaSymbol`.
+        """
+        captures = _java_query().captures(node)
+
+        # Class symbols, keyed by declaration node id so inheritance
+        # and method captures can be attached below. Names come from
+        # the declaration's own `name` field rather than a separate
+        # capture: `captures()` returns each capture name's nodes
+        # independently, with no pairing guarantee between lists once
+        # matches nest (e.g. anonymous classes).
+        class_symbols = {}
+        for decl in captures.get("class.decl", []):
+            if self._outermost_method(decl) is not None:
+                # Classes declared inside method bodies aren't
+                # chunked.
+                continue
+            name_node = decl.child_by_field_name("name")
+            name = code[name_node.start_byte:name_node.end_byte].decode(
+                "utf-8").strip()
+            symbol = types.JavaSymbol(
+                chunk_id=f"{file_path}::{name}",
+                name=name,
+                type=types.SymbolType.CLASS,
+                file_path=file_path,
+                start_byte=decl.start_byte,
+                end_byte=decl.end_byte,
+                start_line=decl.start_point[0] + 1,
+                end_line=decl.end_point[0] + 1,
+                indent=decl.start_point[1],
             )
-        elif node.type == "method_declaration":
-            # Method calls inside. 
-            calls = self._extract_method_calls(node, code)
-            
-            # Add to the parent's method list.  
-            if class_method_list is not None:
-                class_method_list.append(name)
-
-            self.chunks.append(
-                types.JavaSymbol(
-                    chunk_id=f"file_path::{parent_class}.{name}",
-                    name=name,
-                    type=types.SymbolType.METHOD,
-                    file_path=file_path,
-                    code=node_code,
-                    start_line=code_start_line,
-                    end_line=code_end_line,
-                    indent=code_indent_level,
-                    parent_class=parent_class,
-                    calls=calls,
+            class_symbols[decl.id] = symbol
+            self.chunks.append(symbol)
+
+        # Inheritance: the captured node sits under its clause
+        # (`superclass` / `super_interfaces`), whose parent is the
+        # class declaration.
+        for extends_node in captures.get("class.extends", []):
+            symbol = class_symbols.get(extends_node.parent.parent.id)
+            if symbol is not None:
+                symbol.extends.append(
+                    code[extends_node.start_byte:extends_node.end_byte].decode(
+                        "utf-8").strip())
+        for type_list in captures.get("class.implements", []):
+            symbol = class_symbols.get(type_list.parent.parent.id)
+            if symbol is not None:
+                symbol.implements.extend(
+                    interface.decode("utf-8").strip()
+                    for interface in
+                    code[type_list.start_byte:type_list.end_byte].split(b",")
                 )
+
+        # Method symbols; calls are attached afterwards, keyed by
+        # declaration node id.
+        calls_by_method = {}
+        for decl in captures.get("method.decl", []):
+            if self._outermost_method(decl) is not None:
+                # Methods of anonymous/local classes inside a method
+                # body aren't chunked; their calls roll up to the
+                # outer method below.
+                continue
+            name_node = decl.child_by_field_name("name")
+            name = code[name_node.start_byte:name_node.end_byte].decode(
+                "utf-8").strip()
+            enclosing = self._enclosing_class(decl)
+            class_symbol = (
+                class_symbols.get(enclosing.id) if enclosing else None)
+            if class_symbol is not None:
+                enclosing_name = class_symbol.name
+                # Add to the parent's method list.
+                class_symbol.methods.append(name)
+            else:
+                enclosing_name = parent_class
+                if class_method_list is not None:
+                    class_method_list.append(name)
+            # The start line disambiguates overloads, which share a
+            # name within their class.
+            symbol = types.JavaSymbol(
+                chunk_id=(
+                    f"{file_path}::{enclosing_name}.{name}"
+                    f":{decl.start_point[0] + 1}"),
+                name=name,
+                type=types.SymbolType.METHOD,
+                file_path=file_path,
+                start_byte=decl.start_byte,
+                end_byte=decl.end_byte,
+                start_line=decl.start_point[0] + 1,
+                end_line=decl.end_point[0] + 1,
+                indent=decl.start_point[1],
+                parent_class=enclosing_name,
             )
-        else:
-            # Recursively walk through tree. 
-            for child in node.children:
-                self._walk(
-                    child, 
-                    code, 
-                    file_path, 
-                    parent_class, 
-                    class_method_list
-                )
-            
-    def _get_child_text(
-        self, 
-        node: Node, 
-        field_name: str, 
-        code: str
-    ) -> str:
-        """Get name of current node."""
-        child = node.child_by_field_name(field_name)
-        if child:
-            return code[child.start_byte:child.end_byte].strip()
-        return ""
-    
-    def _get_inheritance(
-        self, 
-        node: Node, 
-        code: str
-    ) -> Tuple[List[str], List[str]]:
-        """Get inheritance identifiers for each class.
-        
-        Returns: 
-            Tuple of inheritance where the first element
-            is a list of classes that a node extends and
-            the second is a list of interfaces that a node 
-            implements.
-        """
-        extends = []
-        implements = []
-        
-        for child in node.children:
-            # If a class extends another one. 
-            if child.type == "superclass":
-                for grandchild in child.children:
-                    if grandchild.type == "type_identifier":
-                        extends.append(code[grandchild.start_byte:grandchild.end_byte].strip())
-
-            # If a class implements an interface.
-            elif child.type == "super_interfaces":
-                for grandchild in child.children:
-                    if grandchild.type == "type_list":
-                        interfaces = [
-                            interface.strip() 
-                            for interface in code[grandchild.start_byte:grandchild.end_byte].strip().split(",")
-                        ]
-                        implements.extend(interfaces)
-
-        return extends, implements
-    
-    def _extract_method_calls(self, node, code) -> List[str]:
-        """Extract all methods a method invocates. 
-        
-        
-        Returns:
-            List of method names that a parent method will
-            call inside. 
+            if self._is_trivial_method(decl):
+                # Getters, setters, and empty bodies get a canned
+                # summary instead of an LLM round-trip; the model
+                # adds nothing for a one-line accessor.
+                symbol.summary = f"Accessor for {name}"
+                symbol.skip_llm = True
+            calls_by_method[decl.id] = symbol.calls
+            self.chunks.append(symbol)
+
+        # Method calls, attributed to the outermost enclosing method
+        # (the one that was chunked).
+        for call_node in captures.get("call.name", []):
+            method = self._outermost_method(call_node)
+            if method is None:
+                continue
+            calls = calls_by_method.get(method.id)
+            if calls is not None:
+                calls.append(
+                    code[call_node.start_byte:call_node.end_byte].decode(
+                        "utf-8"))
+
+    @staticmethod
+    def _is_trivial_method(decl: Node) -> bool:
+        """Whether a method body is a trivial accessor or empty.
+
+        Trivial means an empty body, or a single return/assignment
+        statement with no method calls — the getter/setter shape.
         """
-        calls = []
-        
-        # Get all method invocations inside a method.
-        def _collect_calls(n):
-            if n.type == "method_invocation":
-                identifier = n.child_by_field_name("name")
-                if identifier:
-                    calls.append(code[identifier.start_byte:identifier.end_byte])
-            for child in n.children:
-                _collect_calls(child)
-                
-        # Recurse through. 
-        _collect_calls(node)
-        return calls
+        body = decl.child_by_field_name("body")
+        if body is None:
+            # Abstract/interface declarations: leave to the LLM.
+            return False
+        statements = [
+            child for child in body.named_children
+            if not child.type.endswith("comment")
+        ]
+        if not statements:
+            return True
+        if len(statements) != 1 or statements[0].type not in (
+                "return_statement", "expression_statement"):
+            return False
+        # A lone statement still isn't trivial if it delegates to
+        # another method.
+        stack = [statements[0]]
+        while stack:
+            current = stack.pop()
+            if current.type == "method_invocation":
+                return False
+            stack.extend(current.named_children)
+        return True
+
+    @staticmethod
+    def _outermost_method(node: Node) -> Node:
+        """Highest `method_declaration` strictly above `node`, if any."""
+        method = None
+        current = node.parent
+        while current is not None:
+            if current.type == "method_declaration":
+                method = current
+            current = current.parent
+        return method
+
+    @staticmethod
+    def _enclosing_class(node: Node) -> Node:
+        """Nearest `class_declaration` strictly above `node`, if any."""
+        current = node.parent
+        while current is not None:
+            if current.type == "class_declaration":
+                return current
+            current = current.parent
+        return None
+
+
+# Grammar wrapped once at import; every parser and query in the
+# process (including pool workers) shares this Language instead of
+# re-wrapping the compiled grammar per construction.
+_JAVA_LANGUAGE = Language(tree_sitter_java.language())
 
 
 def load_java_parser():
     """Loads java parser."""
-    language = Language(tree_sitter_java.language())
-    return Parser(language)
\ No newline at end of file
+    return Parser(_JAVA_LANGUAGE)
+
+
+# Patterns matched in one compiled query pass per file: class
+# declarations, inheritance clauses, method declarations, and method
+# invocations. Declaration names are read off the node's `name`
+# field in `_walk` instead of being captured separately, so there is
+# no cross-list pairing to get wrong.
+_JAVA_QUERY_SRC = """
+(class_declaration) @class.decl
+(superclass (type_identifier) @class.extends)
+(super_interfaces (type_list) @class.implements)
+(method_declaration) @method.decl
+(method_invocation name: (identifier) @call.name)
+"""
+
+
+@functools.lru_cache(maxsize=1)
+def _java_query():
+    """Compiled tree-sitter query for symbol extraction."""
+    return _JAVA_LANGUAGE.query(_JAVA_QUERY_SRC)
+
+
+# Per-process parser used by the pool workers; tree-sitter `Parser`
+# objects are not picklable, so each worker builds its own lazily
+# and reuses it across files.
+_worker_parser: JavaCodeParser = None
+
+
+def parse_file_worker(file_path: str) -> List[types.JavaSymbol]:
+    """Parse one Java file in a worker process.
+
+    Top-level so it pickles for `ProcessPoolExecutor`; returns the
+    file's chunks for the parent process to collect.
+    """
+    global _worker_parser
+    if _worker_parser is None:
+        _worker_parser = JavaCodeParser(root_dir=os.path.dirname(file_path))
+    _worker_parser.chunks = []
+    _worker_parser._parse_file(file_path)
+    return _worker_parser.chunks
\ No newline at end of file
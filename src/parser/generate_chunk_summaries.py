@@ -8,11 +8,15 @@ By adding both summary and code to the index, this can
 help the LLM answer user queries for their codebase. 
 """
 
-import os 
-from typing import List 
+import hashlib
+import os
+import random
+import re
+from typing import List
 
 import asyncio
 
+from src.common import cache
 from src.common import types
 from src.common.logger import get_logger
 from src.llm import llm_client, prompts
@@ -21,32 +25,184 @@ logger = get_logger(__name__)
 
 
 MAX_CONCURRENT_REQUESTS = 50
-semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
 
- 
-async def generate_chunk_summaries(
-    model: llm_client.LLMModel, 
-    chunk: types.JavaSymbol
-):
-    """Generate a summary for a chunk."""
-    prompt = prompts.CHUNK_SUMMARY_PROMPT.format(
-        name=chunk.name,
-        file_path=chunk.file_path,
-        code=chunk.code
+# Attempts per summary batch when Gemini reports quota exhaustion.
+MAX_SUMMARY_ATTEMPTS = 5
+
+
+class AdaptiveSemaphore:
+    """AIMD concurrency gate for Gemini calls.
+
+    Shrinks effective capacity by one slot on each 429 and grows it
+    back by one after `growth_interval` successes, so throughput
+    settles just under the quota ceiling instead of thrashing
+    between full blast and mass backoff.
+    """
+    def __init__(
+        self,
+        initial: int,
+        minimum: int = 1,
+        growth_interval: int = 10
+    ):
+        self._semaphore = asyncio.Semaphore(initial)
+        self._initial = initial
+        self._capacity = initial
+        self._minimum = minimum
+        self._growth_interval = growth_interval
+        self._successes = 0
+        self._pending_shrink = 0
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._pending_shrink > 0:
+            # Swallow this release to retire a slot.
+            self._pending_shrink -= 1
+        else:
+            self._semaphore.release()
+
+    def record_throttle(self) -> None:
+        """Shrink capacity after a 429."""
+        if self._capacity > self._minimum:
+            self._capacity -= 1
+            self._pending_shrink += 1
+        self._successes = 0
+
+    def record_success(self) -> None:
+        """Grow capacity back after a run of successes."""
+        self._successes += 1
+        if (self._successes >= self._growth_interval
+                and self._capacity < self._initial):
+            self._capacity += 1
+            self._semaphore.release()
+            self._successes = 0
+
+
+semaphore = AdaptiveSemaphore(MAX_CONCURRENT_REQUESTS)
+
+# Content-addressed summaries persisted across runs: warm runs on an
+# unchanged repo skip the LLM entirely for every cached chunk.
+_summary_cache = cache.DiskCache(".cache/summaries")
+
+
+_WHITESPACE_RE = re.compile(rb"\s+")
+
+
+def _chunk_signature(chunk: types.JavaSymbol) -> bytes:
+    """Whitespace-normalized content hash for deduplication.
+
+    Boilerplate bodies (generated getters/setters, `toString`) that
+    differ only in formatting share a signature, so only one
+    representative per signature is summarized.
+    """
+    return hashlib.blake2b(
+        _WHITESPACE_RE.sub(b" ", chunk.code.encode("utf-8")),
+        digest_size=16
+    ).digest()
+
+
+def _summary_cache_key(chunk: types.JavaSymbol, model_name: str) -> str:
+    """Cache key for a chunk summary.
+
+    Hashes the code together with the system instruction and model
+    name so prompt or model changes never serve stale summaries.
+    """
+    return hashlib.blake2b(
+        chunk.code.encode("utf-8")
+        + prompts.CHUNK_SUMMARY_SYSTEM_INSTRUCTION.encode("utf-8")
+        + model_name.encode("utf-8"),
+        digest_size=16
+    ).hexdigest()
+
+# Limits for one batched Gemini request: at most this many chunk
+# prompts, and at most roughly this many prompt tokens. Batching
+# cuts the per-request round-trips from one per symbol to one per
+# ~20 symbols.
+SUMMARY_BATCH_SIZE = 20
+SUMMARY_TOKEN_BUDGET = int(os.getenv("SUMMARY_TOKEN_BUDGET", "6000"))
+
+# Rough per-chunk token cost of the prompt template around the code.
+_PROMPT_TOKEN_OVERHEAD = 60
+
+
+def _approx_tokens(chunk: types.JavaSymbol) -> int:
+    """Cheap token estimate for a chunk's summary prompt (~4 chars/token)."""
+    return (
+        len(chunk.code) // 4
+        + len(chunk.name) // 4
+        + _PROMPT_TOKEN_OVERHEAD
     )
-    try:
-        async with semaphore:
-            summary = await model.generate(prompt)
-            chunk.summary = summary
-    except Exception as e:
-        # TODO: clean up. 
-        if "429" in str(e):
-            logger.debug(
-                "Gemini Quota Error after multiple attempts")
+
+
+def _pack_chunks(
+    chunks: List[types.JavaSymbol]
+) -> List[List[types.JavaSymbol]]:
+    """Pack chunks into token-budgeted batches.
+
+    First-fit-decreasing: sort chunks by estimated prompt tokens,
+    then drop each into the first batch with room. Tiny getters fill
+    the space left around big classes instead of each paying a full
+    request, while oversized chunks get a batch of their own.
+    """
+    bins: List[List[types.JavaSymbol]] = []
+    bin_tokens: List[int] = []
+    for chunk in sorted(chunks, key=_approx_tokens, reverse=True):
+        tokens = _approx_tokens(chunk)
+        for i, used in enumerate(bin_tokens):
+            if (used + tokens <= SUMMARY_TOKEN_BUDGET
+                    and len(bins[i]) < SUMMARY_BATCH_SIZE):
+                bins[i].append(chunk)
+                bin_tokens[i] += tokens
+                break
         else:
+            bins.append([chunk])
+            bin_tokens.append(tokens)
+    return bins
+
+
+async def generate_chunk_summaries(
+    model: llm_client.LLMModel,
+    chunks: List[types.JavaSymbol]
+):
+    """Generate summaries for a batch of chunks with one request.
+
+    Packs each chunk's summary prompt into a single batched Gemini
+    call and assigns the returned summaries back in place.
+    """
+    batch_prompts = [
+        prompts.CHUNK_SUMMARY_PROMPT.format(
+            name=chunk.name,
+            file_path=chunk.file_path,
+            code=chunk.code
+        )
+        for chunk in chunks
+    ]
+    for attempt in range(MAX_SUMMARY_ATTEMPTS):
+        try:
+            async with semaphore:
+                summaries = await model.generate_batch(batch_prompts)
+        except Exception as e:
+            if "429" in str(e) and attempt < MAX_SUMMARY_ATTEMPTS - 1:
+                # Quota exhausted: give the quota a slot back and
+                # retry this batch with jittered backoff instead of
+                # dropping its summaries.
+                semaphore.record_throttle()
+                await asyncio.sleep(2 ** attempt + random.random())
+                continue
             logger.error(
                 f"Error calling gemini to generate summary for chunk: {str(e)}")
-        
+            break
+        semaphore.record_success()
+        for chunk, summary in zip(chunks, summaries):
+            if summary:
+                chunk.summary = summary
+                _summary_cache.set(
+                    _summary_cache_key(chunk, model.model_name), summary)
+        break
+    return chunks
+
    
 async def generate_all_chunk_summaries(chunks: List[types.JavaSymbol]) -> None:
     """Generate summaries for all chunks.
@@ -67,25 +223,66 @@ async def generate_all_chunk_summaries(chunks: List[types.JavaSymbol]) -> None:
             logger.error("Missing required environment variables: PROJECT_ID, LOCATION, or MODEL_NAME")
             return
         
-        llm_model = llm_client.LLMModel(
-            project_id=project_id, 
-            location=location, 
+        # Shared singleton: reuses the authenticated transport (and
+        # its connection pool) across runs and with the other
+        # generators instead of paying client setup per call.
+        llm_model = llm_client.get_model(
+            project_id=project_id,
+            location=location,
             model_name=model_name,
             system_instruction=prompts.CHUNK_SUMMARY_SYSTEM_INSTRUCTION
         )
         
-        # Create tasks for each chunk.
+        # Serve unchanged chunks from the on-disk summary cache;
+        # only misses are sent to the model. Trivial chunks were
+        # already summarized by the parser and skip the LLM.
+        pending = []
+        for chunk in chunks:
+            if chunk.skip_llm:
+                continue
+            cached = _summary_cache.get(
+                _summary_cache_key(chunk, model_name))
+            if cached is not None:
+                chunk.summary = cached
+            else:
+                pending.append(chunk)
+        if not pending:
+            return
+
+        # Summarize one representative per distinct (whitespace-
+        # normalized) body; the summary fans back out to every
+        # duplicate after generation.
+        by_signature = {}
+        for chunk in pending:
+            by_signature.setdefault(_chunk_signature(chunk), []).append(chunk)
+        representatives = [group[0] for group in by_signature.values()]
+
+        # Create one task per token-budgeted batch of chunks; the
+        # semaphore gates whole batches rather than individual chunks.
         tasks = [
-            generate_chunk_summaries(llm_model, chunk)
-            for chunk in chunks
+            generate_chunk_summaries(llm_model, batch)
+            for batch in _pack_chunks(representatives)
         ]
-        
-        try:
-            await asyncio.gather(*tasks)
-        except asyncio.TimeoutError:
-            logger.error("Timeout while generating summaries")
-        except Exception as e:
-            logger.error(f"Error during summary generation: {str(e)}")
+
+        # Consume batches as they finish rather than gathering on
+        # the slowest one, broadcasting each representative's
+        # summary to its duplicates (and caching them under their
+        # own keys) as soon as the batch lands.
+        for finished in asyncio.as_completed(tasks):
+            try:
+                batch = await finished
+            except Exception as e:
+                logger.error(f"Error during summary generation: {str(e)}")
+                continue
+            for chunk in batch:
+                group = by_signature.get(_chunk_signature(chunk), [])
+                summary = chunk.summary
+                if not summary:
+                    continue
+                for duplicate in group[1:]:
+                    duplicate.summary = summary
+                    _summary_cache.set(
+                        _summary_cache_key(duplicate, model_name), summary)
     except Exception as e:
         logger.error(f"Failed to generate summaries for chunks: {str(e)}")
         raise
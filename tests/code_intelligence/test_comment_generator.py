@@ -0,0 +1,75 @@
+"""Test comment merging and validation."""
+
+from src.code_intelligence import comment_generator
+
+
+JAVA_SOURCE = (
+    "public class Sample {\n"
+    "    int getValue() { return 1; }\n"
+    "}\n"
+)
+
+
+def _write_java_file(tmp_path):
+    file_path = tmp_path / "Sample.java"
+    file_path.write_text(JAVA_SOURCE)
+    return str(file_path)
+
+
+def test_format_comment_block_indents_every_line():
+    block = comment_generator.format_comment_block(
+        "/**\n * Returns the value.\n */", 4)
+
+    assert block == [
+        b"    /**\n",
+        b"    * Returns the value.\n",
+        b"    */\n",
+    ]
+
+
+def test_format_file_comments_inserts_before_target_line(tmp_path):
+    file_path = _write_java_file(tmp_path)
+    comments = [{
+        "comment": "/** Returns the value. */",
+        "line_number": 2,
+        "indent_level": 4,
+    }]
+
+    merged_lines = comment_generator.format_file_comments(file_path, comments)
+
+    assert merged_lines == [
+        b"public class Sample {\n",
+        b"    /** Returns the value. */\n",
+        b"    int getValue() { return 1; }\n",
+        b"}\n",
+    ]
+
+
+def test_format_file_comments_appends_past_eof_comments(tmp_path):
+    file_path = _write_java_file(tmp_path)
+    comments = [{
+        "comment": "/** Dangling. */",
+        "line_number": 100,
+        "indent_level": 0,
+    }]
+
+    merged_lines = comment_generator.format_file_comments(file_path, comments)
+
+    assert merged_lines[-1] == b"/** Dangling. */\n"
+    assert b"".join(merged_lines).startswith(JAVA_SOURCE.encode("utf-8"))
+
+
+def test_validate_new_file_accepts_commented_file(tmp_path):
+    file_path = _write_java_file(tmp_path)
+    merged_lines = comment_generator.format_file_comments(file_path, [{
+        "comment": "/** Returns the value. */",
+        "line_number": 2,
+        "indent_level": 4,
+    }])
+
+    assert comment_generator.validate_new_file(merged_lines)
+
+
+def test_validate_new_file_rejects_broken_java():
+    assert not comment_generator.validate_new_file(
+        [b"public class Broken {\n"])
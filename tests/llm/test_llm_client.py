@@ -0,0 +1,47 @@
+"""Test batched LLM response parsing."""
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from src.llm import llm_client
+
+
+@pytest.fixture
+def model():
+    """Returns an LLMModel pointed at a dummy project."""
+    return llm_client.LLMModel(
+        location="us-central1", project_id="dummy_project")
+
+
+@pytest.mark.asyncio
+@patch("src.llm.llm_client.LLMModel.generate", new_callable=AsyncMock)
+async def test_generate_batch_maps_responses_by_id(mock_generate, model):
+    mock_generate.return_value = (
+        '[{"id": 1, "response": "second"}, {"id": 0, "response": "first"}]')
+
+    responses = await model.generate_batch(["prompt a", "prompt b"])
+
+    assert responses == ["first", "second"]
+    mock_generate.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+@patch("src.llm.llm_client.LLMModel.generate", new_callable=AsyncMock)
+async def test_generate_batch_ignores_unknown_ids(mock_generate, model):
+    mock_generate.return_value = (
+        '[{"id": 1, "response": "second"}, {"id": 5, "response": "extra"}, '
+        '{"id": "bad", "response": "junk"}]')
+
+    responses = await model.generate_batch(["prompt a", "prompt b"])
+
+    assert responses == [None, "second"]
+
+
+@pytest.mark.asyncio
+@patch("src.llm.llm_client.LLMModel.generate", new_callable=AsyncMock)
+async def test_generate_batch_returns_nones_on_bad_json(mock_generate, model):
+    mock_generate.return_value = "not json at all"
+
+    responses = await model.generate_batch(["prompt a", "prompt b"])
+
+    assert responses == [None, None]
@@ -4,9 +4,18 @@ import os
 import pytest
 from unittest.mock import AsyncMock, patch
 
+from src.common import cache
+from src.parser import generate_chunk_summaries as chunk_summaries
 from src.parser.generate_chunk_summaries import generate_all_chunk_summaries
 
 
+@pytest.fixture(autouse=True)
+def isolated_summary_cache(tmp_path, monkeypatch):
+    """Point the on-disk summary cache at a fresh directory."""
+    monkeypatch.setattr(
+        chunk_summaries, "_summary_cache", cache.DiskCache(str(tmp_path)))
+
+
 @pytest.mark.asyncio
 @patch("src.parser.generate_chunk_summaries.llm_client.LLMModel.generate", new_callable=AsyncMock)
 @patch.dict(os.environ, {
@@ -15,7 +24,8 @@ from src.parser.generate_chunk_summaries import generate_all_chunk_summaries
     "MODEL_NAME": "gemini-2.5-flash"
 })
 async def test_generate_all_chunk_summaries_success(mock_generate, sample_chunk):
-    mock_generate.return_value = "This is a test summary."
+    mock_generate.return_value = (
+        '[{"id": 0, "response": "This is a test summary."}]')
     chunks = [sample_chunk]
 
     await generate_all_chunk_summaries(chunks)
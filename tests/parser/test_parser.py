@@ -9,10 +9,10 @@ from src.parser.code_parser import JavaCodeParser
 def test_get_java_files(sample_project_dir):
     """Test parse retrieves all java files in directory."""
     parser = JavaCodeParser(root_dir=sample_project_dir)
-    files = parser._get_java_files()
+    files = list(parser._get_java_files())
     assert len(files) > 0
     assert all(f.endswith(".java") for f in files)
-    
+
     parser = JavaCodeParser("./non_existent_dir")
     with pytest.raises(FileNotFoundError):
             parser._get_java_files()
@@ -65,9 +65,10 @@ def test_parse_class(sample_project_dir):
     }
     """
 
-    tree = parser.parser.parse(test_code.encode("utf-8"))
-    parser._walk(tree.root_node, test_code, "TestFile.java")
-    
+    code_bytes = test_code.encode("utf-8")
+    tree = parser.parser.parse(code_bytes)
+    parser._walk(tree.root_node, code_bytes, "TestFile.java")
+
     # Assert class was parsed correctly
     assert len(parser.chunks) > 0
     class_chunk = next(c for c in parser.chunks if c.type == types.SymbolType.CLASS)
@@ -93,8 +94,9 @@ def test_parse_method(sample_project_dir):
     }
     """
 
-    tree = parser.parser.parse(test_code.encode("utf-8"))
-    parser._walk(tree.root_node, test_code, "TestFile.java")
+    code_bytes = test_code.encode("utf-8")
+    tree = parser.parser.parse(code_bytes)
+    parser._walk(tree.root_node, code_bytes, "TestFile.java")
 
     method_chunks = [c for c in parser.chunks if c.type == types.SymbolType.METHOD]
     method_names = [m.name for m in method_chunks]
@@ -110,3 +112,53 @@ def test_parse_method(sample_project_dir):
     assert greet_chunk.file_path == "TestFile.java"
     assert greet_chunk.start_line > 0
     assert greet_chunk.end_line >= greet_chunk.start_line
+
+
+def test_parse_anonymous_class_keeps_names_paired(sample_project_dir):
+    """Test symbols around an anonymous class keep their own names."""
+    parser = JavaCodeParser(sample_project_dir)
+
+    test_code = """
+    public class Counter {
+        private int x;
+
+        public int getX() {
+            return x;
+        }
+
+        public void run() {
+            Runnable task = new Runnable() {
+                public void run() {
+                    step();
+                }
+            };
+            go();
+        }
+
+        public void after() {
+            cleanup();
+        }
+    }
+    """
+
+    code_bytes = test_code.encode("utf-8")
+    tree = parser.parser.parse(code_bytes)
+    parser._walk(tree.root_node, code_bytes, "TestFile.java")
+
+    class_chunk = next(
+        c for c in parser.chunks if c.type == types.SymbolType.CLASS)
+    assert class_chunk.name == "Counter"
+    # The anonymous Runnable's `run` belongs to no chunked class.
+    assert sorted(class_chunk.methods) == ["after", "getX", "run"]
+
+    method_chunks = {
+        c.name: c for c in parser.chunks
+        if c.type == types.SymbolType.METHOD
+    }
+    assert sorted(method_chunks) == ["after", "getX", "run"]
+    # Calls from the anonymous class body roll up to the enclosing
+    # method, and each method keeps its own calls and triviality.
+    assert sorted(method_chunks["run"].calls) == ["go", "step"]
+    assert method_chunks["after"].calls == ["cleanup"]
+    assert method_chunks["getX"].skip_llm
+    assert not method_chunks["run"].skip_llm